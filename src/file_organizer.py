@@ -4,16 +4,245 @@ import logging
 from datetime import datetime
 from pathlib import Path
 import json
-from typing import Dict, List, Optional, Callable, Any
-from dataclasses import dataclass
+import csv
+import bisect
+import fnmatch
+import heapq
+import time
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Callable, Any, Tuple, Set
+from dataclasses import dataclass, field
+
+# 文件大小分布的分桶上限（字节），最后一档为无上限
+SIZE_BUCKETS = [
+    (4 * 1024, "<4KB"),
+    (64 * 1024, "4KB-64KB"),
+    (1024 * 1024, "64KB-1MB"),
+    (16 * 1024 * 1024, "1MB-16MB"),
+    (256 * 1024 * 1024, "16MB-256MB"),
+    (1024 * 1024 * 1024, "256MB-1GB"),
+    (float("inf"), ">=1GB"),
+]
+
+# 文件修改时间分布的分桶上限（秒），最后一档为无上限
+AGE_BUCKETS = [
+    (24 * 3600, "<1天"),
+    (7 * 24 * 3600, "1-7天"),
+    (30 * 24 * 3600, "7-30天"),
+    (365 * 24 * 3600, "30天-1年"),
+    (float("inf"), ">=1年"),
+]
+
+UNCATEGORIZED = "未分类"
+
+# 小文件打包生成的索引文件名
+PACK_INDEX_NAME = "packed_index.json"
 
 @dataclass
 class FileOperation:
     """文件操作记录"""
-    operation_type: str  # "move" 或 "rename"
+    operation_type: str  # "move"、"rename" 或 "pack"
     source_path: Path
     target_path: Path
+    archive_member: Optional[str] = None  # "pack" 操作对应的归档成员名
+    category: Optional[str] = None
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+def _bucket_label(value: float, buckets: List[Tuple[float, str]]) -> str:
+    """返回数值所在分桶的标签"""
+    for upper, label in buckets:
+        if value < upper:
+            return label
+    return buckets[-1][1]
+
+
+@dataclass
+class CategoryStats:
+    """单个类别的统计信息，最大文件列表使用定长最小堆保存"""
+    top_n: int = 10
+    count: int = 0
+    total_size: int = 0
+    size_histogram: Dict[str, int] = field(
+        default_factory=lambda: {label: 0 for _, label in SIZE_BUCKETS})
+    age_histogram: Dict[str, int] = field(
+        default_factory=lambda: {label: 0 for _, label in AGE_BUCKETS})
+    largest: List[Tuple[int, str]] = field(default_factory=list)
+
+    def add(self, path: str, size: int, age: float) -> None:
+        """记录一个文件"""
+        self.count += 1
+        self.total_size += size
+        self.size_histogram[_bucket_label(size, SIZE_BUCKETS)] += 1
+        self.age_histogram[_bucket_label(age, AGE_BUCKETS)] += 1
+        self._push_largest((size, path))
+
+    def merge(self, other: "CategoryStats") -> None:
+        """合并另一个统计结果"""
+        self.count += other.count
+        self.total_size += other.total_size
+        for label, value in other.size_histogram.items():
+            self.size_histogram[label] += value
+        for label, value in other.age_histogram.items():
+            self.age_histogram[label] += value
+        for item in other.largest:
+            self._push_largest(item)
+
+    def _push_largest(self, item: Tuple[int, str]) -> None:
+        if self.top_n <= 0:
+            return
+        if len(self.largest) < self.top_n:
+            heapq.heappush(self.largest, item)
+        elif item > self.largest[0]:
+            heapq.heapreplace(self.largest, item)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            "文件数": self.count,
+            "总大小": self.total_size,
+            "大小分布": dict(self.size_histogram),
+            "时间分布": dict(self.age_histogram),
+            "最大文件": [{"路径": path, "大小": size}
+                     for size, path in sorted(self.largest, reverse=True)],
+        }
+
     
+class OperationIndex:
+    """按类别、目标目录和时间索引的操作记录，用于选择性撤销"""
+
+    def __init__(self):
+        self._live: Dict[int, FileOperation] = {}
+        self._by_category: Dict[str, Dict[int, FileOperation]] = {}
+        self._by_target_dir: Dict[Path, Dict[int, FileOperation]] = {}
+        # 目标目录统一使用绝对路径，相对路径和绝对路径的查询结果一致
+        self._target_dirs: Dict[int, Path] = {}
+        # 按时间排序的操作，已删除的操作在查询时跳过，过多时再压缩
+        self._timestamps: List[datetime] = []
+        self._timed: List[FileOperation] = []
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def add(self, operation: FileOperation) -> None:
+        """添加操作记录"""
+        key = id(operation)
+        self._live[key] = operation
+        if operation.category:
+            self._by_category.setdefault(operation.category, {})[key] = operation
+        target_dir = operation.target_path.parent.resolve()
+        self._target_dirs[key] = target_dir
+        self._by_target_dir.setdefault(target_dir, {})[key] = operation
+        position = bisect.bisect_right(self._timestamps, operation.timestamp)
+        self._timestamps.insert(position, operation.timestamp)
+        self._timed.insert(position, operation)
+
+    def remove(self, operation: FileOperation) -> None:
+        """移除操作记录"""
+        key = id(operation)
+        if self._live.pop(key, None) is None:
+            return
+        if operation.category:
+            self._discard(self._by_category, operation.category, key)
+        self._discard(self._by_target_dir, self._target_dirs.pop(key), key)
+        if len(self._timed) > 2 * len(self._live) + 64:
+            self._timed = [op for op in self._timed if id(op) in self._live]
+            self._timestamps = [op.timestamp for op in self._timed]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._live.clear()
+        self._by_category.clear()
+        self._by_target_dir.clear()
+        self._target_dirs.clear()
+        self._timestamps.clear()
+        self._timed.clear()
+
+    def query(self,
+              category: Optional[str] = None,
+              target_dir: Optional[str] = None,
+              start_time: Optional[datetime] = None,
+              end_time: Optional[datetime] = None,
+              path_pattern: Optional[str] = None) -> List[FileOperation]:
+        """查找符合全部条件的操作，按时间先后排序
+
+        先从类别、目标目录或时间范围中候选最少的索引取出候选操作，
+        再用其余条件过滤，无需扫描全部记录。
+
+        Args:
+            category: 类别名称
+            target_dir: 目标目录，包含其子目录
+            start_time: 起始时间（包含），带时区的时间会转换为本地时间
+            end_time: 结束时间（包含），带时区的时间会转换为本地时间
+            path_pattern: 匹配原路径或文件名的通配符模式
+
+        Returns:
+            匹配的操作列表
+        """
+        start_time = self._to_local_naive(start_time)
+        end_time = self._to_local_naive(end_time)
+        candidates: List[List[FileOperation]] = []
+        if category is not None:
+            candidates.append(list(self._by_category.get(category, {}).values()))
+        if target_dir is not None:
+            target_dir = Path(target_dir).resolve()
+            candidates.append([op
+                               for directory, operations in self._by_target_dir.items()
+                               if directory == target_dir or target_dir in directory.parents
+                               for op in operations.values()])
+        if start_time is not None or end_time is not None:
+            low = bisect.bisect_left(self._timestamps, start_time) if start_time else 0
+            high = bisect.bisect_right(self._timestamps, end_time) if end_time else len(self._timed)
+            candidates.append([op for op in self._timed[low:high] if id(op) in self._live])
+        if not candidates:
+            candidates.append(list(self._live.values()))
+
+        matches = [op for op in min(candidates, key=len)
+                   if self._matches(op, category, target_dir, start_time, end_time, path_pattern)]
+        matches.sort(key=lambda op: op.timestamp)
+        return matches
+
+    @staticmethod
+    def _to_local_naive(value: Optional[datetime]) -> Optional[datetime]:
+        """操作时间为本地时间且不带时区，带时区的查询时间需先转换"""
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+
+    def _matches(self,
+                 operation: FileOperation,
+                 category: Optional[str],
+                 target_dir: Optional[Path],
+                 start_time: Optional[datetime],
+                 end_time: Optional[datetime],
+                 path_pattern: Optional[str]) -> bool:
+        if category is not None and operation.category != category:
+            return False
+        if target_dir is not None:
+            parent = self._target_dirs[id(operation)]
+            if parent != target_dir and target_dir not in parent.parents:
+                return False
+        if start_time is not None and operation.timestamp < start_time:
+            return False
+        if end_time is not None and operation.timestamp > end_time:
+            return False
+        if path_pattern is not None:
+            if not (fnmatch.fnmatch(str(operation.source_path), path_pattern)
+                    or fnmatch.fnmatch(operation.source_path.name, path_pattern)):
+                return False
+        return True
+
+    @staticmethod
+    def _discard(index: Dict[Any, Dict[int, FileOperation]], key: Any, operation_key: int) -> None:
+        operations = index.get(key)
+        if operations is not None:
+            operations.pop(operation_key, None)
+            if not operations:
+                del index[key]
+
+
 class FileOrganizer:
     """智能文件整理工具的核心类"""
     
@@ -27,6 +256,7 @@ class FileOrganizer:
         self.rules = self._load_rules()
         self._setup_logging()
         self.operations_history: List[FileOperation] = []
+        self._operation_index = OperationIndex()
         
     def _setup_logging(self):
         """设置日志记录"""
@@ -94,6 +324,156 @@ class FileOrganizer:
                     
         return preview_results
         
+    def analyze_directory(self,
+                          directory: str,
+                          recursive: bool = True,
+                          top_n: int = 10,
+                          max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """统计目录下各类别的文件数量、大小及分布
+
+        每个子目录由线程池中的一个任务扫描并生成局部统计，主线程负责合并。
+        最大文件列表使用定长堆保存，内存占用与文件总数无关。
+
+        Args:
+            directory: 要分析的目录路径
+            recursive: 是否递归分析子目录
+            top_n: 每个类别保留的最大文件数量
+            max_workers: 线程池大小，默认与ThreadPoolExecutor的默认值一致
+
+        Returns:
+            分析报告，包含总体统计和 {类别: 统计信息}
+        """
+        directory = Path(directory)
+        if not directory.exists():
+            logging.error(f"目录 {directory} 不存在")
+            raise FileNotFoundError(f"目录 {directory} 不存在")
+        if not directory.is_dir():
+            logging.error(f"{directory} 不是目录")
+            raise NotADirectoryError(f"{directory} 不是目录")
+
+        now = time.time()
+        totals: Dict[str, CategoryStats] = {}
+        errors = 0
+
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        # 限制同时排队的任务数，待扫描目录只保存路径
+        max_pending = max_workers * 2
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            waiting = [str(directory)]
+            pending = set()
+
+            while waiting or pending:
+                while waiting and len(pending) < max_pending:
+                    pending.add(executor.submit(
+                        self._scan_directory_stats, waiting.pop(), now, top_n))
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    partial, subdirs, partial_errors = future.result()
+                    errors += partial_errors
+                    for category, stats in partial.items():
+                        if category in totals:
+                            totals[category].merge(stats)
+                        else:
+                            totals[category] = stats
+                    if recursive:
+                        waiting.extend(subdirs)
+
+        report = {
+            "目录": str(directory),
+            "总文件数": sum(stats.count for stats in totals.values()),
+            "总大小": sum(stats.total_size for stats in totals.values()),
+            "错误": errors,
+            "类别": {category: stats.to_dict()
+                   for category, stats in sorted(totals.items(),
+                                                 key=lambda item: item[1].total_size,
+                                                 reverse=True)},
+        }
+        logging.info(f"已分析目录 {directory}：共 {report['总文件数']} 个文件")
+        return report
+
+    def _scan_directory_stats(self,
+                              directory: str,
+                              now: float,
+                              top_n: int) -> Tuple[Dict[str, CategoryStats], List[str], int]:
+        """扫描单个目录（不递归）并生成局部统计
+
+        Args:
+            directory: 目录路径
+            now: 计算文件时间分布的基准时间戳
+            top_n: 每个类别保留的最大文件数量
+
+        Returns:
+            (局部统计, 子目录列表, 错误数)
+        """
+        partial: Dict[str, CategoryStats] = {}
+        subdirs: List[str] = []
+        errors = 0
+
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            logging.error(f"无法读取目录 {directory}: {str(e)}")
+            return partial, subdirs, 1
+
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        category = self._get_file_category(Path(entry.name)) or UNCATEGORIZED
+                        if category not in partial:
+                            partial[category] = CategoryStats(top_n=top_n)
+                        partial[category].add(entry.path, stat.st_size,
+                                              max(now - stat.st_mtime, 0))
+                except OSError as e:
+                    logging.error(f"读取文件 {entry.path} 信息时出错: {str(e)}")
+                    errors += 1
+
+        return partial, subdirs, errors
+
+    def export_analysis(self,
+                        report: Dict[str, Any],
+                        output_path: str,
+                        file_format: Optional[str] = None) -> None:
+        """导出分析报告
+
+        Args:
+            report: analyze_directory 返回的分析报告
+            output_path: 输出文件路径
+            file_format: "json" 或 "csv"，默认根据文件扩展名判断，无法识别时使用json
+        """
+        output_path = Path(output_path)
+        if file_format is None:
+            file_format = "csv" if output_path.suffix.lower() == ".csv" else "json"
+        file_format = file_format.lower()
+
+        if file_format == "json":
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=4)
+        elif file_format == "csv":
+            size_labels = [label for _, label in SIZE_BUCKETS]
+            age_labels = [label for _, label in AGE_BUCKETS]
+            with open(output_path, 'w', encoding='utf-8-sig', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(["类别", "文件数", "总大小"] + size_labels + age_labels + ["最大文件"])
+                for category, stats in report["类别"].items():
+                    largest = "; ".join(f"{item['路径']} ({item['大小']})"
+                                        for item in stats["最大文件"])
+                    writer.writerow(
+                        [category, stats["文件数"], stats["总大小"]]
+                        + [stats["大小分布"][label] for label in size_labels]
+                        + [stats["时间分布"][label] for label in age_labels]
+                        + [largest])
+        else:
+            raise ValueError(f"不支持的导出格式：{file_format}")
+
+        logging.info(f"分析报告已导出到 {output_path}")
+
     def organize_directory(self, 
                          directory: str, 
                          create_dirs: bool = True,
@@ -115,6 +495,7 @@ class FileOrganizer:
             
         stats = {"总文件数": 0, "已整理": 0, "跳过": 0, "错误": 0}
         self.operations_history.clear()
+        self._operation_index.clear()
         
         # 获取所有文件列表
         files = list(directory.glob("*"))
@@ -139,12 +520,13 @@ class FileOrganizer:
                             operation = FileOperation(
                                 operation_type="move",
                                 source_path=file_path,
-                                target_path=target_path
+                                target_path=target_path,
+                                category=category
                             )
                             
                             # 移动文件
                             shutil.move(str(file_path), str(target_path))
-                            self.operations_history.append(operation)
+                            self._record_operation(operation)
                             
                             logging.info(f"已移动文件 {file_path.name} 到 {category}")
                             stats["已整理"] += 1
@@ -164,30 +546,463 @@ class FileOrganizer:
                     
         return stats
         
-    def undo_operation(self, operation: FileOperation) -> None:
+    def pack_small_files(self,
+                         directory: str,
+                         categories: Optional[List[str]] = None,
+                         size_threshold: int = 64 * 1024,
+                         archive_format: str = "zip",
+                         max_archive_size: int = 256 * 1024 * 1024,
+                         max_files_per_archive: int = 10000) -> Dict:
+        """将分类目录中的小文件打包成滚动归档，减少inode和元数据开销
+
+        应在 organize_directory 之后调用。每个类别目录中小于阈值的文件
+        被流式写入 packed_0001.zip 等归档，归档达到大小或数量上限时换新文件，
+        并在 packed_index.json 中记录每个成员的原路径。打包操作会追加到
+        operations_history，可通过 undo_operation 还原。符号链接不会被打包。
+        organize_directory 会清空操作记录，之后或在新的 FileOrganizer 中
+        可用 load_pack_operations 从索引重新加载打包操作。
+
+        Args:
+            directory: 已整理的目录路径
+            categories: 要打包的类别，默认为所有规则中的类别
+            size_threshold: 小于该大小（字节）的文件会被打包
+            archive_format: 归档格式，"zip" 或 "tar"
+            max_archive_size: 单个归档的最大原始数据量（字节）
+            max_files_per_archive: 单个归档的最大文件数
+
+        Returns:
+            打包结果统计
+        """
+        directory = Path(directory)
+        if not directory.exists():
+            logging.error(f"目录 {directory} 不存在")
+            raise FileNotFoundError(f"目录 {directory} 不存在")
+        if archive_format not in ("zip", "tar"):
+            raise ValueError(f"不支持的归档格式：{archive_format}")
+
+        stats = {"已打包": 0, "归档数": 0, "打包大小": 0, "错误": 0, "节省inode": 0}
+
+        for category in categories or list(self.rules.keys()):
+            category_dir = directory / category
+            if not category_dir.is_dir():
+                continue
+
+            index_path = category_dir / PACK_INDEX_NAME
+            index_existed = index_path.exists()
+            index = self._load_pack_index(index_path)
+            # 只有索引中仍有条目的归档才视为已打包的归档
+            packed_archives = {entry["归档"] for entry in index}
+
+            small_files = []
+            for file_path in sorted(category_dir.glob("*")):
+                if (file_path.is_symlink() or not file_path.is_file()
+                        or file_path.name == PACK_INDEX_NAME
+                        or file_path.name in packed_archives):
+                    continue
+                try:
+                    size = file_path.stat().st_size
+                except OSError as e:
+                    logging.error(f"读取文件 {file_path.name} 信息时出错: {str(e)}")
+                    stats["错误"] += 1
+                    continue
+                if size < size_threshold:
+                    small_files.append((file_path, size))
+
+            # 少于两个文件时打包无法节省inode
+            if len(small_files) < 2:
+                continue
+
+            archive_count = 0
+            batch: List[Tuple[Path, int]] = []
+            batch_size = 0
+            for file_path, size in small_files:
+                if batch and (len(batch) >= max_files_per_archive
+                              or batch_size + size > max_archive_size):
+                    if self._write_pack_archive(category_dir, batch, archive_format,
+                                                index, index_path, stats):
+                        archive_count += 1
+                    batch, batch_size = [], 0
+                batch.append((file_path, size))
+                batch_size += size
+            if batch and self._write_pack_archive(category_dir, batch, archive_format,
+                                                  index, index_path, stats):
+                archive_count += 1
+
+            if archive_count:
+                if not index_existed and index_path.exists():
+                    # 首次打包时新建了索引文件
+                    stats["节省inode"] -= 1
+                logging.info(f"已将 {category} 中的小文件打包为 {archive_count} 个归档")
+
+        stats["节省inode"] += stats["已打包"] - stats["归档数"]
+        return stats
+
+    def load_pack_operations(self,
+                             directory: str,
+                             categories: Optional[List[str]] = None) -> int:
+        """从各类别的 packed_index.json 重建打包操作记录
+
+        用于在操作记录被清空后（如再次整理或重新启动程序）还原已打包的文件。
+        已在 operations_history 中的打包操作不会重复加载，归档已不存在的条目会被跳过。
+        操作时间取归档文件的修改时间。
+
+        Args:
+            directory: 已整理的目录路径
+            categories: 要加载的类别，默认为所有规则中的类别
+
+        Returns:
+            新加载的操作数量
+        """
+        directory = Path(directory)
+        if not directory.exists():
+            logging.error(f"目录 {directory} 不存在")
+            raise FileNotFoundError(f"目录 {directory} 不存在")
+
+        known = {(op.target_path.resolve(), op.archive_member)
+                 for op in self.operations_history if op.operation_type == "pack"}
+        loaded: List[FileOperation] = []
+
+        for category in categories or list(self.rules.keys()):
+            category_dir = directory / category
+            index = self._load_pack_index(category_dir / PACK_INDEX_NAME)
+            archive_times: Dict[str, Optional[datetime]] = {}
+            for entry in index:
+                archive_path = category_dir / entry["归档"]
+                if entry["归档"] not in archive_times:
+                    archive_times[entry["归档"]] = (
+                        datetime.fromtimestamp(archive_path.stat().st_mtime)
+                        if archive_path.exists() else None)
+                timestamp = archive_times[entry["归档"]]
+                if timestamp is None:
+                    logging.warning(f"归档 {archive_path} 不存在，跳过 {entry['成员']}")
+                    continue
+                if (archive_path.resolve(), entry["成员"]) in known:
+                    continue
+                loaded.append(FileOperation(
+                    operation_type="pack",
+                    source_path=Path(entry["原路径"]),
+                    target_path=archive_path,
+                    archive_member=entry["成员"],
+                    category=category,
+                    timestamp=timestamp
+                ))
+
+        # 按时间顺序加入记录，保证 undo_last_operation 先撤销最新的打包
+        loaded.sort(key=lambda op: op.timestamp)
+        for operation in loaded:
+            self._record_operation(operation)
+        logging.info(f"已从索引加载 {len(loaded)} 个打包操作")
+        return len(loaded)
+
+    def _write_pack_archive(self,
+                            category_dir: Path,
+                            batch: List[Tuple[Path, int]],
+                            archive_format: str,
+                            index: List[Dict[str, Any]],
+                            index_path: Path,
+                            stats: Dict) -> bool:
+        """将一批文件写入新归档，保存索引后再删除原文件并记录操作
+
+        Returns:
+            是否成功生成归档
+        """
+        extension = ".zip" if archive_format == "zip" else ".tar"
+        archive_number = len({entry["归档"] for entry in index}) + 1
+        archive_path = self._get_unique_path(category_dir / f"packed_{archive_number:04d}{extension}")
+        packed: List[Tuple[Path, int]] = []
+
+        try:
+            if archive_format == "zip":
+                with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                    for file_path, size in batch:
+                        try:
+                            # ZipFile.write 按块读取文件内容
+                            archive.write(file_path, arcname=file_path.name)
+                            packed.append((file_path, size))
+                        except OSError as e:
+                            logging.error(f"打包文件 {file_path.name} 时出错: {str(e)}")
+                            stats["错误"] += 1
+            else:
+                with tarfile.open(archive_path, 'w') as archive:
+                    for file_path, size in batch:
+                        try:
+                            archive.add(str(file_path), arcname=file_path.name)
+                            packed.append((file_path, size))
+                        except OSError as e:
+                            logging.error(f"打包文件 {file_path.name} 时出错: {str(e)}")
+                            stats["错误"] += 1
+        except Exception as e:
+            logging.error(f"创建归档 {archive_path.name} 时出错: {str(e)}")
+            stats["错误"] += 1
+            if archive_path.exists():
+                archive_path.unlink()
+            return False
+
+        if not packed:
+            archive_path.unlink()
+            return False
+
+        # 先将索引写入磁盘再删除原文件，中途中断时仍能从索引找到每个文件所在的归档
+        for file_path, size in packed:
+            index.append({
+                "归档": archive_path.name,
+                "成员": file_path.name,
+                "原路径": str(file_path),
+                "大小": size
+            })
+        self._save_pack_index(index_path, index)
+
+        failed = set()
+        for file_path, size in packed:
+            try:
+                file_path.unlink()
+            except OSError as e:
+                logging.error(f"删除原文件 {file_path.name} 时出错: {str(e)}")
+                stats["错误"] += 1
+                failed.add(file_path.name)
+                continue
+            self._record_operation(FileOperation(
+                operation_type="pack",
+                source_path=file_path,
+                target_path=archive_path,
+                archive_member=file_path.name,
+                category=category_dir.name
+            ))
+            stats["已打包"] += 1
+            stats["打包大小"] += size
+
+        if failed:
+            # 原文件仍然存在，不再将其记录为已打包
+            index[:] = [entry for entry in index
+                        if not (entry["归档"] == archive_path.name and entry["成员"] in failed)]
+            self._save_pack_index(index_path, index)
+            if len(failed) == len(packed):
+                archive_path.unlink()
+                return False
+
+        stats["归档数"] += 1
+        return True
+
+    def _load_pack_index(self, index_path: Path) -> List[Dict[str, Any]]:
+        """加载打包索引，不存在时返回空列表"""
+        if not index_path.exists():
+            return []
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_pack_index(self, index_path: Path, index: List[Dict[str, Any]]) -> None:
+        """保存打包索引，索引为空时删除索引文件"""
+        if not index:
+            if index_path.exists():
+                index_path.unlink()
+            return
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=4)
+
+    def _undo_pack_operations(self, operations: List[FileOperation]) -> Dict[int, Any]:
+        """批量撤销打包操作
+
+        每个归档只打开一次并解压其中所有选中的成员，每个类别的索引只改写一次。
+        归档本身不会被重写，已还原的成员仍留在归档文件中，但会从索引中删除，
+        不再被视为已打包；归档不再有索引条目时删除归档。
+
+        Args:
+            operations: 要撤销的 "pack" 操作
+
+        Returns:
+            {id(操作): 实际还原路径，或撤销失败时的异常}
+        """
+        results: Dict[int, Any] = {}
+        by_archive: Dict[Path, List[FileOperation]] = {}
+        for operation in operations:
+            by_archive.setdefault(operation.target_path, []).append(operation)
+
+        for archive_path, archive_operations in by_archive.items():
+            if not archive_path.exists():
+                error = FileNotFoundError(f"无法找到要撤销的归档：{archive_path}")
+                for operation in archive_operations:
+                    results[id(operation)] = error
+                continue
+            try:
+                self._extract_members(archive_path, archive_operations, results)
+            except Exception as e:
+                for operation in archive_operations:
+                    results.setdefault(id(operation), e)
+
+        # 按类别目录汇总已还原的成员，每个索引只写一次
+        restored: Dict[Path, Set[Tuple[str, str]]] = {}
+        for operation in operations:
+            if not isinstance(results[id(operation)], Exception):
+                restored.setdefault(operation.target_path.parent, set()).add(
+                    (operation.target_path.name, operation.archive_member))
+
+        for category_dir, members in restored.items():
+            index_path = category_dir / PACK_INDEX_NAME
+            index = [entry for entry in self._load_pack_index(index_path)
+                     if (entry["归档"], entry["成员"]) not in members]
+            self._save_pack_index(index_path, index)
+            remaining = {entry["归档"] for entry in index}
+            for archive_name in {archive_name for archive_name, _ in members} - remaining:
+                archive_path = category_dir / archive_name
+                if archive_path.exists():
+                    archive_path.unlink()
+                    logging.info(f"归档 {archive_name} 中的文件已全部还原，已删除该归档")
+
+        return results
+
+    def _extract_members(self,
+                         archive_path: Path,
+                         operations: List[FileOperation],
+                         results: Dict[int, Any]) -> None:
+        """打开归档一次，将各操作对应的成员流式解压到原位置
+
+        归档类型由扩展名决定。原位置已被占用时使用 _get_unique_path 生成的新名称。
+        """
+        is_zip = archive_path.suffix.lower() == ".zip"
+        with (zipfile.ZipFile(archive_path) if is_zip else tarfile.open(archive_path)) as archive:
+            # tar 归档只扫描一次成员头
+            tar_members = None if is_zip else {info.name: info for info in archive.getmembers()}
+            for operation in operations:
+                try:
+                    if is_zip:
+                        src = archive.open(operation.archive_member)
+                    else:
+                        info = tar_members.get(operation.archive_member)
+                        src = archive.extractfile(info) if info is not None else None
+                        if src is None:
+                            raise FileNotFoundError(
+                                f"归档 {archive_path} 中不存在文件 {operation.archive_member}")
+                    operation.source_path.parent.mkdir(parents=True, exist_ok=True)
+                    restore_path = self._get_unique_path(operation.source_path)
+                    with src, open(restore_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                    results[id(operation)] = restore_path
+                    logging.info(f"已撤销打包操作：{archive_path} -> {restore_path}")
+                except Exception as e:
+                    results[id(operation)] = e
+
+    def _record_operation(self, operation: FileOperation) -> None:
+        """记录操作并加入索引"""
+        self.operations_history.append(operation)
+        self._operation_index.add(operation)
+
+    def undo_operation(self, operation: FileOperation) -> Path:
         """撤销文件操作
         
+        如果原位置已被占用，文件会以 _get_unique_path 生成的新名称还原。
+        
         Args:
             operation: 要撤销的操作
+            
+        Returns:
+            文件实际还原到的路径
         """
         if operation.operation_type == "move":
             if operation.target_path.exists():
                 # 确保源目录存在
                 operation.source_path.parent.mkdir(parents=True, exist_ok=True)
+                restore_path = self._get_unique_path(operation.source_path)
                 # 移动文件回原位置
-                shutil.move(str(operation.target_path), str(operation.source_path))
-                logging.info(f"已撤销移动操作：{operation.target_path} -> {operation.source_path}")
+                shutil.move(str(operation.target_path), str(restore_path))
+                logging.info(f"已撤销移动操作：{operation.target_path} -> {restore_path}")
             else:
                 raise FileNotFoundError(f"无法找到要撤销的文件：{operation.target_path}")
+        elif operation.operation_type == "pack":
+            # 从归档中流式解压文件到原位置
+            restore_path = self._undo_pack_operations([operation])[id(operation)]
+            if isinstance(restore_path, Exception):
+                raise restore_path
+        else:
+            raise ValueError(f"不支持撤销的操作类型：{operation.operation_type}")
+        return restore_path
                 
     def undo_last_operation(self) -> None:
         """撤销最后一次操作"""
         if self.operations_history:
             operation = self.operations_history.pop()
+            self._operation_index.remove(operation)
             self.undo_operation(operation)
         else:
             raise ValueError("没有可撤销的操作")
             
+    def find_operations(self,
+                        category: Optional[str] = None,
+                        target_dir: Optional[str] = None,
+                        start_time: Optional[datetime] = None,
+                        end_time: Optional[datetime] = None,
+                        path_pattern: Optional[str] = None) -> List[FileOperation]:
+        """通过索引查找符合条件的操作记录
+        
+        Args:
+            category: 类别名称
+            target_dir: 目标目录，包含其子目录
+            start_time: 起始时间（包含）
+            end_time: 结束时间（包含）
+            path_pattern: 匹配原路径或文件名的通配符模式，如 "*.log"
+            
+        Returns:
+            按时间先后排序的操作列表
+        """
+        return self._operation_index.query(category, target_dir, start_time, end_time, path_pattern)
+        
+    def undo_operations(self,
+                        category: Optional[str] = None,
+                        target_dir: Optional[str] = None,
+                        start_time: Optional[datetime] = None,
+                        end_time: Optional[datetime] = None,
+                        path_pattern: Optional[str] = None) -> Dict:
+        """选择性撤销符合条件的操作
+        
+        条件含义同 find_operations，全部为空时撤销所有操作。匹配的操作按
+        时间倒序撤销，连续的打包操作通过 _undo_pack_operations 批量撤销，
+        原位置被占用时使用不重复的新文件名。
+        
+        Returns:
+            撤销结果统计
+        """
+        operations = self.find_operations(category, target_dir, start_time, end_time, path_pattern)
+        stats = {"匹配": len(operations), "已撤销": 0, "重命名": 0, "错误": 0}
+        undone = set()
+        
+        def record_result(operation: FileOperation, result: Any) -> None:
+            if isinstance(result, Exception):
+                logging.error(f"撤销 {operation.target_path} 时出错: {str(result)}")
+                stats["错误"] += 1
+                return
+            undone.add(id(operation))
+            self._operation_index.remove(operation)
+            stats["已撤销"] += 1
+            if result != operation.source_path:
+                stats["重命名"] += 1
+                
+        def flush_packs() -> None:
+            results = self._undo_pack_operations(pending_packs)
+            for pack_operation in pending_packs:
+                record_result(pack_operation, results[id(pack_operation)])
+            pending_packs.clear()
+            
+        pending_packs: List[FileOperation] = []
+        for operation in reversed(operations):
+            if operation.operation_type == "pack":
+                pending_packs.append(operation)
+                continue
+            # 先还原较新的打包操作，再撤销更早的移动
+            if pending_packs:
+                flush_packs()
+            try:
+                result = self.undo_operation(operation)
+            except Exception as e:
+                result = e
+            record_result(operation, result)
+        if pending_packs:
+            flush_packs()
+                
+        if undone:
+            self.operations_history = [op for op in self.operations_history
+                                       if id(op) not in undone]
+        logging.info(f"选择性撤销完成：已撤销 {stats['已撤销']} 个操作")
+        return stats
+            
     def _get_file_category(self, file_path: Path) -> Optional[str]:
         """根据文件扩展名确定分类
         
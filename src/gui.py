@@ -3,8 +3,10 @@ from tkinter import ttk, filedialog, messagebox
 from tkinter.font import Font
 from pathlib import Path
 import json
-from typing import Dict, List, Any
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Set
 import threading
+import time
 from file_organizer import FileOrganizer
 import os
 import sys
@@ -22,7 +24,14 @@ class ModernTheme:
 class FileOrganizerGUI:
     """文件整理工具的图形界面"""
     
-    def __init__(self):
+    # 搜索框输入停止多久后才过滤规则列表（毫秒）
+    FILTER_DELAY_MS = 200
+    # 每次空闲时插入规则列表的行数
+    RULE_BATCH_SIZE = 200
+    # 检查后台初始化是否完成的间隔（毫秒）
+    POLL_INTERVAL_MS = 20
+    
+    def __init__(self, config_path: Optional[str] = None):
         self.window = tk.Tk()
         self.window.title("智能文件整理工具")
         self.window.geometry("900x700")
@@ -51,17 +60,62 @@ class FileOrganizerGUI:
         except Exception as e:
             logging.warning(f"无法加载图标: {str(e)}")
             
-        # 创建文件整理器实例
-        self.organizer = FileOrganizer()
+        # 文件整理器在后台线程中创建（读取规则、配置日志），完成前相关按钮不可用
+        self.organizer: Optional[FileOrganizer] = None
+        self._config_path = config_path
+        self._pending_organizer: Optional[FileOrganizer] = None
+        self._organizer_error: Optional[Exception] = None
+        self._organizer_thread = threading.Thread(target=self._create_organizer, daemon=True)
+        self._organizer_thread.start()
         
         # 初始化变量
         self.is_organizing = False
         self.undo_stack = []
         
+        # 规则搜索索引和列表状态
+        self._rule_text: Dict[str, str] = {}
+        self._rule_order: Dict[str, int] = {}
+        self._char_index: Dict[str, Set[str]] = {}
+        self._item_rules: Dict[str, str] = {}
+        self._rule_items: Dict[str, str] = {}
+        self._visible_rules: List[str] = []
+        self._last_query: Optional[str] = None
+        self._filter_job = None
+        self._render_generation = 0
+        self._ready = False
+        
         self._setup_styles()
         self._create_widgets()
-        self._load_rules()
+        self.status_var.set("正在加载...")
+        self.window.after(self.POLL_INTERVAL_MS, self._poll_organizer)
+        
+    def _create_organizer(self):
+        """在后台线程中创建文件整理器"""
+        try:
+            if self._config_path is None:
+                self._pending_organizer = FileOrganizer()
+            else:
+                self._pending_organizer = FileOrganizer(self._config_path)
+        except Exception as e:
+            self._organizer_error = e
+            
+    def _poll_organizer(self):
+        """等待后台初始化完成，然后启用按钮并加载规则"""
+        if self._organizer_thread.is_alive():
+            self.window.after(self.POLL_INTERVAL_MS, self._poll_organizer)
+            return
+            
+        if self._organizer_error is not None:
+            self.status_var.set("出错")
+            messagebox.showerror("错误", f"初始化失败：{str(self._organizer_error)}")
+            return
+            
+        self.organizer = self._pending_organizer
+        for button in self._organizer_buttons:
+            button.state(["!disabled"])
         self._setup_shortcuts()
+        self._load_rules()
+        self.status_var.set("就绪")
         
     def _setup_styles(self):
         """设置自定义样式"""
@@ -96,10 +150,86 @@ class FileOrganizerGUI:
             self.directory_var.set(directory)
             
     def _load_rules(self):
-        """加载并显示分类规则"""
-        self.rules_tree.delete(*self.rules_tree.get_children())
-        for category, extensions in self.organizer.rules.items():
-            self.rules_tree.insert("", tk.END, values=(category, ", ".join(extensions)))
+        """加载分类规则，重建搜索索引并按当前搜索条件显示"""
+        self._ready = False
+        self._render_generation += 1
+        if self._item_rules:
+            self.rules_tree.delete(*self._item_rules)
+        self._item_rules.clear()
+        self._rule_items.clear()
+        self._visible_rules = []
+        self._build_search_index()
+        
+        if self._filter_job is not None:
+            self.window.after_cancel(self._filter_job)
+        self._apply_filter()
+        
+    def _build_search_index(self):
+        """为类别名和扩展名建立字符索引（字符 -> 包含该字符的类别集合）"""
+        self._rule_text.clear()
+        self._rule_order.clear()
+        self._char_index.clear()
+        self._last_query = None
+        for position, (category, extensions) in enumerate(self.organizer.rules.items()):
+            text = f"{category}\n{', '.join(extensions)}".lower()
+            self._rule_text[category] = text
+            self._rule_order[category] = position
+            for char in set(text):
+                self._char_index.setdefault(char, set()).add(category)
+                
+    def _match_rules(self, query: str) -> List[str]:
+        """返回类别名或扩展名包含查询文本的类别，保持规则原有顺序"""
+        if not query:
+            return list(self._rule_text)
+            
+        if self._last_query is not None and self._last_query in query:
+            # 查询变长时只需在上次的结果中继续筛选
+            candidates = self._visible_rules
+        else:
+            char_sets = sorted((self._char_index.get(char, set()) for char in set(query)), key=len)
+            hits = set.intersection(*char_sets)
+            candidates = sorted(hits, key=self._rule_order.__getitem__)
+            
+        return [category for category in candidates if query in self._rule_text[category]]
+        
+    def _show_rules(self, categories: List[str]):
+        """增量更新规则列表，只显示指定的类别"""
+        self._render_generation += 1
+        visible = set(categories)
+        attached = self.rules_tree.get_children()
+        hidden = [item for item in attached if self._item_rules[item] not in visible]
+        if hidden:
+            self.rules_tree.detach(*hidden)
+        self._visible_rules = categories
+        
+        if len(attached) - len(hidden) == len(categories):
+            # 结果只是缩小，剩余行的顺序不变，无需移动
+            self._ready = True
+            return
+        self._place_rule_batch(self._render_generation, 0)
+        
+    def _place_rule_batch(self, generation: int, start: int):
+        """分批创建或移动规则行，避免大量规则阻塞界面"""
+        if generation != self._render_generation:
+            return
+            
+        end = min(start + self.RULE_BATCH_SIZE, len(self._visible_rules))
+        for index in range(start, end):
+            category = self._visible_rules[index]
+            item = self._rule_items.get(category)
+            if item is None:
+                # 规则行在首次显示时才创建
+                extensions = self.organizer.rules[category]
+                item = self.rules_tree.insert("", index, values=(category, ", ".join(extensions)))
+                self._rule_items[category] = item
+                self._item_rules[item] = category
+            else:
+                self.rules_tree.move(item, "", index)
+                
+        if end < len(self._visible_rules):
+            self.window.after_idle(self._place_rule_batch, generation, end)
+        else:
+            self._ready = True
             
     def _add_rule_dialog(self):
         """显示添加规则对话框"""
@@ -335,6 +465,19 @@ class FileOrganizerGUI:
                   text="撤销上次操作 (Ctrl+Z)", 
                   style="Modern.TButton",
                   command=self._undo_last_operation).grid(row=0, column=2, padx=5)
+        ttk.Button(action_frame, 
+                  text="分析目录", 
+                  style="Modern.TButton",
+                  command=self._analyze_directory).grid(row=0, column=3, padx=5)
+        ttk.Button(action_frame, 
+                  text="选择性撤销", 
+                  style="Modern.TButton",
+                  command=self._selective_undo_dialog).grid(row=0, column=4, padx=5)
+        
+        # 依赖文件整理器的按钮在初始化完成前不可用
+        self._organizer_buttons = btn_frame.winfo_children() + action_frame.winfo_children()
+        for button in self._organizer_buttons:
+            button.state(["disabled"])
         
         # 状态栏
         self.status_var = tk.StringVar(value="就绪")
@@ -348,14 +491,22 @@ class FileOrganizerGUI:
         self.window.grid_columnconfigure(0, weight=1)
         
     def _filter_rules(self, *args):
+        """搜索框内容变化时延迟过滤，连续输入只触发一次"""
+        if self._filter_job is not None:
+            self.window.after_cancel(self._filter_job)
+        self._filter_job = self.window.after(self.FILTER_DELAY_MS, self._apply_filter)
+        
+    def _apply_filter(self):
         """根据搜索条件过滤规则列表"""
+        self._filter_job = None
+        if self.organizer is None:
+            # 规则加载完成后会再次应用过滤
+            return
+            
         search_text = self.search_var.get().lower()
-        self.rules_tree.delete(*self.rules_tree.get_children())
-        
-        for category, extensions in self.organizer.rules.items():
-            if (search_text in category.lower() or 
-                search_text in ", ".join(extensions).lower()):
-                self.rules_tree.insert("", tk.END, values=(category, ", ".join(extensions)))
+        matches = self._match_rules(search_text)
+        self._last_query = search_text
+        self._show_rules(matches)
                 
     def _import_rules(self):
         """导入规则"""
@@ -421,6 +572,151 @@ class FileOrganizerGUI:
         except Exception as e:
             messagebox.showerror("错误", f"预览失败：{str(e)}")
             
+    def _analyze_directory(self):
+        """分析目录并导出统计报告"""
+        directory = self.directory_var.get()
+        if not directory:
+            messagebox.showwarning("警告", "请先选择要分析的目录")
+            return
+            
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("CSV files", "*.csv"), ("All files", "*.*")])
+        if not file_path:
+            return
+            
+        def analyze_thread():
+            try:
+                report = self.organizer.analyze_directory(directory)
+                self.organizer.export_analysis(report, file_path)
+            except Exception as e:
+                self.window.after(0, self._on_analysis_done, None, e)
+            else:
+                self.window.after(0, self._on_analysis_done, report, None)
+                
+        self.status_var.set("正在分析目录...")
+        threading.Thread(target=analyze_thread, daemon=True).start()
+        
+    def _on_analysis_done(self, report: Optional[Dict[str, Any]], error: Optional[Exception]):
+        """在主线程中显示分析结果"""
+        self.status_var.set("就绪")
+        if error is not None:
+            messagebox.showerror("错误", f"分析失败：{str(error)}")
+            return
+            
+        messagebox.showinfo("完成", 
+                          f"分析完成！\n"
+                          f"总文件数：{report['总文件数']}\n"
+                          f"总大小：{report['总大小']} 字节")
+            
+    def _selective_undo_dialog(self):
+        """显示选择性撤销对话框"""
+        dialog = tk.Toplevel(self.window)
+        dialog.title("选择性撤销")
+        dialog.geometry("420x320")
+        dialog.configure(bg=ModernTheme.BACKGROUND)
+        
+        ttk.Label(dialog, 
+                 text="类别：",
+                 style="Modern.TLabel").grid(row=0, column=0, padx=5, pady=5)
+        category_var = tk.StringVar()
+        ttk.Combobox(dialog, 
+                    textvariable=category_var,
+                    values=list(self.organizer.rules.keys()),
+                    font=ModernTheme.FONT).grid(row=0, column=1, padx=5, pady=5)
+        
+        ttk.Label(dialog, 
+                 text="目标目录：",
+                 style="Modern.TLabel").grid(row=1, column=0, padx=5, pady=5)
+        target_dir_var = tk.StringVar()
+        ttk.Entry(dialog, 
+                 textvariable=target_dir_var,
+                 font=ModernTheme.FONT).grid(row=1, column=1, padx=5, pady=5)
+        
+        ttk.Label(dialog, 
+                 text="路径模式：\n(如 *.txt)",
+                 style="Modern.TLabel").grid(row=2, column=0, padx=5, pady=5)
+        pattern_var = tk.StringVar()
+        ttk.Entry(dialog, 
+                 textvariable=pattern_var,
+                 font=ModernTheme.FONT).grid(row=2, column=1, padx=5, pady=5)
+        
+        ttk.Label(dialog, 
+                 text="开始时间：\n(如 2025-01-12 09:30)",
+                 style="Modern.TLabel").grid(row=3, column=0, padx=5, pady=5)
+        start_var = tk.StringVar()
+        ttk.Entry(dialog, 
+                 textvariable=start_var,
+                 font=ModernTheme.FONT).grid(row=3, column=1, padx=5, pady=5)
+        
+        ttk.Label(dialog, 
+                 text="结束时间：",
+                 style="Modern.TLabel").grid(row=4, column=0, padx=5, pady=5)
+        end_var = tk.StringVar()
+        ttk.Entry(dialog, 
+                 textvariable=end_var,
+                 font=ModernTheme.FONT).grid(row=4, column=1, padx=5, pady=5)
+        
+        def undo_selected():
+            category = category_var.get().strip() or None
+            target_dir = target_dir_var.get().strip() or None
+            pattern = pattern_var.get().strip() or None
+            try:
+                start_time = self._parse_time(start_var.get())
+                end_time = self._parse_time(end_var.get(), end_of_day=True)
+            except ValueError as e:
+                messagebox.showerror("错误", str(e), parent=dialog)
+                return
+            if not (category or target_dir or pattern or start_time or end_time):
+                messagebox.showerror("错误", "请至少填写一个条件", parent=dialog)
+                return
+                
+            try:
+                stats = self.organizer.undo_operations(category=category,
+                                                       target_dir=target_dir,
+                                                       start_time=start_time,
+                                                       end_time=end_time,
+                                                       path_pattern=pattern)
+                dialog.destroy()
+                messagebox.showinfo("完成", 
+                                  f"匹配：{stats['匹配']}\n"
+                                  f"已撤销：{stats['已撤销']}\n"
+                                  f"重命名：{stats['重命名']}\n"
+                                  f"错误：{stats['错误']}")
+            except Exception as e:
+                messagebox.showerror("错误", f"撤销失败：{str(e)}")
+                
+        ttk.Button(dialog, 
+                  text="撤销",
+                  style="Modern.TButton",
+                  command=undo_selected).grid(row=5, column=0, columnspan=2, pady=20)
+        
+        # 使对话框模态
+        dialog.transient(self.window)
+        dialog.grab_set()
+        
+    @staticmethod
+    def _parse_time(text: str, end_of_day: bool = False) -> Optional[datetime]:
+        """解析对话框中输入的时间，留空返回None
+        
+        Args:
+            text: 形如 "2025-01-12 09:30:00"、"2025-01-12 09:30" 或 "2025-01-12" 的时间
+            end_of_day: 只输入日期时是否取当天结束时刻
+        """
+        text = text.strip()
+        if not text:
+            return None
+        for time_format in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+            try:
+                return datetime.strptime(text, time_format)
+            except ValueError:
+                pass
+        try:
+            day = datetime.strptime(text, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"无法识别的时间：{text}")
+        return day + timedelta(days=1, microseconds=-1) if end_of_day else day
+        
     def _undo_last_operation(self):
         """撤销上次操作"""
         if not self.undo_stack:
@@ -485,6 +781,38 @@ class FileOrganizerGUI:
         """运行GUI程序"""
         self.window.mainloop()
 
+def benchmark_startup(config_path: Optional[str] = None, repeat: int = 5) -> Dict[str, float]:
+    """测量GUI启动耗时
+    
+    Args:
+        config_path: 规则文件路径，可用于测试大量规则时的启动速度
+        repeat: 重复次数，取最短耗时
+        
+    Returns:
+        {阶段: 秒数}，包括窗口首次绘制和规则列表加载完成的耗时
+    """
+    window_times = []
+    ready_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        app = FileOrganizerGUI(config_path)
+        app.window.update()
+        window_times.append(time.perf_counter() - start)
+        
+        while not app._ready and app._organizer_error is None:
+            app.window.update()
+            time.sleep(0.001)
+        ready_times.append(time.perf_counter() - start)
+        app.window.destroy()
+        
+    return {"窗口显示": min(window_times), "规则加载完成": min(ready_times)}
+
 if __name__ == "__main__":
-    app = FileOrganizerGUI()
-    app.run() 
\ No newline at end of file
+    if "--benchmark-startup" in sys.argv:
+        # 用法：python gui.py --benchmark-startup [规则文件]
+        args = sys.argv[sys.argv.index("--benchmark-startup") + 1:]
+        for stage, seconds in benchmark_startup(args[0] if args else None).items():
+            print(f"{stage}：{seconds * 1000:.1f} ms")
+    else:
+        app = FileOrganizerGUI()
+        app.run() 
\ No newline at end of file
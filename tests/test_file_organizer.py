@@ -0,0 +1,81 @@
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from file_organizer import FileOrganizer, PACK_INDEX_NAME
+
+
+@pytest.fixture
+def organizer(tmp_path, monkeypatch):
+    # 日志写入 ../logs，切换工作目录避免写到仓库外
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    monkeypatch.chdir(work_dir)
+    return FileOrganizer(str(tmp_path / "rules.json"))
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory = tmp_path / "data"
+    directory.mkdir()
+    for i in range(6):
+        (directory / f"doc{i}.txt").write_text(f"文档 {i}", encoding="utf-8")
+        (directory / f"code{i}.py").write_text(f"print({i})", encoding="utf-8")
+    return directory
+
+
+@pytest.mark.parametrize("archive_format", ["zip", "tar"])
+def test_selective_undo_restores_packed_category(organizer, data_dir, monkeypatch, archive_format):
+    organizer.organize_directory(str(data_dir))
+    stats = organizer.pack_small_files(str(data_dir),
+                                       archive_format=archive_format,
+                                       max_files_per_archive=4)
+    assert stats["已打包"] == 12
+
+    saves = []
+    save_pack_index = organizer._save_pack_index
+    monkeypatch.setattr(organizer, "_save_pack_index",
+                        lambda path, index: (saves.append(path), save_pack_index(path, index)))
+
+    result = organizer.undo_operations(category="文档")
+
+    assert result == {"匹配": 12, "已撤销": 12, "重命名": 0, "错误": 0}
+    # 一个类别的索引只改写一次
+    assert saves == [data_dir / "文档" / PACK_INDEX_NAME]
+    assert sorted(p.name for p in data_dir.glob("doc*.txt")) == [f"doc{i}.txt" for i in range(6)]
+    assert (data_dir / "doc3.txt").read_text(encoding="utf-8") == "文档 3"
+    assert list((data_dir / "文档").iterdir()) == []
+    # 其他类别不受影响
+    assert (data_dir / "代码" / PACK_INDEX_NAME).exists()
+    assert len(organizer.find_operations(category="代码")) == 12
+
+
+def test_undo_tar_pack_of_zip_files(organizer, tmp_path):
+    directory = tmp_path / "archives"
+    directory.mkdir()
+    for i in range(3):
+        with zipfile.ZipFile(directory / f"z{i}.zip", "w") as archive:
+            archive.writestr("a.txt", "x" * 100)
+
+    organizer.organize_directory(str(directory))
+    organizer.pack_small_files(str(directory), categories=["压缩文件"], archive_format="tar")
+    result = organizer.undo_operations(category="压缩文件")
+
+    assert result["错误"] == 0
+    assert all(zipfile.is_zipfile(directory / f"z{i}.zip") for i in range(3))
+
+
+def test_load_pack_operations_after_history_cleared(organizer, data_dir):
+    organizer.organize_directory(str(data_dir))
+    organizer.pack_small_files(str(data_dir), categories=["文档"])
+
+    restarted = FileOrganizer(organizer.config_path)
+    assert restarted.load_pack_operations(str(data_dir)) == 6
+    assert restarted.load_pack_operations(str(data_dir)) == 0
+
+    restarted.undo_operations(category="文档")
+    assert sorted(p.name for p in (data_dir / "文档").iterdir()) == [f"doc{i}.txt" for i in range(6)]